@@ -0,0 +1,89 @@
+"""
+Synthetic Open-Meteo air quality payloads for benchmarks and load tests.
+
+Payloads have the same shape as the real API ({"latitude", "longitude",
+"hourly": {"time": [...], "<field>": [...]}}), with a diurnal cycle, noise and
+occasional nulls, and are deterministic for a given city, window and seed.
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import zlib
+from datetime import datetime, timedelta, timezone
+
+# Open-Meteo field -> (typical level, daily swing)
+FIELD_PROFILES = {
+    "pm2_5": (25.0, 12.0),
+    "pm10": (45.0, 20.0),
+    "carbon_monoxide": (300.0, 120.0),
+    "nitrogen_dioxide": (30.0, 15.0),
+    "sulphur_dioxide": (8.0, 4.0),
+    "ozone": (60.0, 30.0),
+    "european_aqi": (40.0, 20.0),
+}
+NULL_RATE = 0.01
+
+
+def make_cities(n):
+    """n synthetic CITY_CONFIG entries spread over the globe."""
+    rng = random.Random(n)
+    cities = []
+    for i in range(n):
+        cities.append(
+            {
+                "city": f"Bench City {i + 1:04d}",
+                "latitude": round(rng.uniform(-60, 70), 4),
+                "longitude": round(rng.uniform(-180, 180), 4),
+                "country": "XX",
+            }
+        )
+    return cities
+
+
+def make_payload(latitude, longitude, start, hours, seed=0):
+    """Hourly payload for `hours` hours from `start` (a UTC datetime on the hour)."""
+    rng = random.Random(zlib.crc32(f"{latitude},{longitude},{start.isoformat()},{seed}".encode()))
+    times = [(start + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M") for i in range(hours)]
+    hourly = {"time": times}
+    for field, (level, swing) in FIELD_PROFILES.items():
+        phase = rng.uniform(0, 2 * math.pi)
+        values = []
+        for i in range(hours):
+            if rng.random() < NULL_RATE:
+                values.append(None)
+                continue
+            v = level + swing * math.sin(2 * math.pi * (start.hour + i) / 24 + phase) + rng.gauss(0, swing / 4)
+            values.append(round(max(v, 0.0), 1))
+        hourly[field] = values
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "timezone": "UTC",
+        "hourly_units": {"time": "iso8601"},
+        "hourly": hourly,
+    }
+
+
+def default_window(years, now=None):
+    """(start, hours) covering `years` years up to the current hour."""
+    now = (now or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+    hours = max(int(years * 365 * 24), 1)
+    return now - timedelta(hours=hours - 1), hours
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Write synthetic Open-Meteo payloads as JSON lines.")
+    ap.add_argument("--cities", type=int, default=13)
+    ap.add_argument("--years", type=float, default=1.0)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    start, hours = default_window(args.years)
+    for cfg in make_cities(args.cities):
+        payload = make_payload(cfg["latitude"], cfg["longitude"], start, hours, args.seed)
+        sys.stdout.write(json.dumps(payload) + "\n")
+
+
+if __name__ == "__main__":
+    main()
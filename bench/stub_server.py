@@ -0,0 +1,119 @@
+"""
+Local stand-in for the Open-Meteo air quality endpoint, serving synthetic
+payloads from generate.py. Understands comma-separated (multi-location)
+coordinates, start_date/end_date, and otherwise serves a fixed window of
+`years` years up to now. The first `failures` requests are answered with
+503, to exercise the ETL's retries. Point the ETL at it with OPEN_METEO_API.
+
+    python bench/stub_server.py --port 8765 --years 2
+    OPEN_METEO_API=http://127.0.0.1:8765/v1/air-quality python etl/run_etl.py
+"""
+import argparse
+import json
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from generate import default_window, make_payload
+
+
+class StubServer:
+    def __init__(self, host="127.0.0.1", port=0, years=1.0, seed=0, latency=0.0, failures=0):
+        self.years = years
+        self.seed = seed
+        self.latency = latency
+        self.failures = failures
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/air-quality"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def window(self, query):
+        if "start_date" in query and "end_date" in query:
+            start = datetime.strptime(query["start_date"][0], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            end = datetime.strptime(query["end_date"][0], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            return start, int((end - start).total_seconds() // 3600) + 24
+        return default_window(self.years)
+
+    def _handler(self):
+        server = self
+
+        @lru_cache(maxsize=4096)
+        def encoded(lat, lon, start, hours):
+            return json.dumps(make_payload(float(lat), float(lon), start, hours, server.seed)).encode()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    failing = server.failures > 0
+                    if failing:
+                        server.failures -= 1
+                if failing:
+                    self._send(503, json.dumps({"error": True, "reason": "injected failure"}).encode())
+                    return
+                query = parse_qs(urlparse(self.path).query)
+                try:
+                    lats = query["latitude"][0].split(",")
+                    lons = query["longitude"][0].split(",")
+                    start, hours = server.window(query)
+                except (KeyError, ValueError) as ex:
+                    self._send(400, json.dumps({"error": True, "reason": str(ex)}).encode())
+                    return
+                bodies = [encoded(lat, lon, start, hours) for lat, lon in zip(lats, lons)]
+                body = bodies[0] if len(bodies) == 1 else b"[" + b",".join(bodies) + b"]"
+                if server.latency:
+                    threading.Event().wait(server.latency)
+                self._send(200, body)
+
+            def _send(self, status, body):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serve synthetic Open-Meteo payloads.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--years", type=float, default=1.0, help="history served when no start_date/end_date is given")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--latency", type=float, default=0.0, help="artificial per-request delay in seconds")
+    ap.add_argument("--failures", type=int, default=0, help="answer the first N requests with 503")
+    args = ap.parse_args(argv)
+    server = StubServer(args.host, args.port, args.years, args.seed, args.latency, args.failures)
+    print(f"Serving synthetic Open-Meteo data at {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
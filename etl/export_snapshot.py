@@ -0,0 +1,226 @@
+"""
+Export the warehouse as Parquet files for BI tools and offline analysis, so
+they read files instead of querying Postgres alongside the dashboard.
+
+    python etl/export_snapshot.py --out /data/air_quality_export
+
+Hourly facts (v_fact_air_quality, so either fact layout) are written
+already joined with their dimensions, one file per city and month, in
+Hive-style folders (city_key=<slug>/month=<YYYY-MM>/). A _manifest.json at
+the top (skipped by Parquet dataset readers) lists every partition with its
+row count, time range and the source change marker it was built from.
+Re-runs only rewrite partitions with facts loaded since they were exported
+(the ETL stamps agg_daily_pollution.updated_at for every day it writes
+facts for). A month whose hourly facts were compacted by retention is
+recorded as "compacted", keeping the file of its last export if there was
+one, and is not retried until it changes again.
+Requires pyarrow (pip install pyarrow).
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from run_etl import city_slug, get_conn
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency, only needed by this command
+    pa = pq = None
+
+EXPORT_DIR = os.getenv("EXPORT_DIR")
+EXPORT_COMPRESSION = os.getenv("EXPORT_COMPRESSION", "zstd")
+# Rows fetched from the server-side cursor and written per Parquet row group
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "50000"))
+MANIFEST = "_manifest.json"
+
+COLUMNS = [
+    ("city", "string"),
+    ("location", "string"),
+    ("country", "string"),
+    ("latitude", "float64"),
+    ("longitude", "float64"),
+    ("ts_utc", "timestamp[us, tz=UTC]"),
+    ("date", "date32"),
+    ("hour", "int32"),
+    ("pollutant", "string"),
+    ("pollutant_name", "string"),
+    ("unit", "string"),
+    ("value", "float64"),
+    ("aqi", "float64"),
+    ("source", "string"),
+]
+
+PARTITION_SQL = """
+    SELECT dl.city, dl.location, dl.country, dl.latitude::float8, dl.longitude::float8,
+           f.ts_utc, dt.date, dt.hour, dp.code, dp.name, dp.unit,
+           f.value::float8, f.aqi::float8, f.source
+    FROM v_fact_air_quality f
+    JOIN dim_location dl ON dl.location_id = f.location_id
+    JOIN dim_time dt ON dt.time_id = f.time_id
+    JOIN dim_pollutant dp ON dp.pollutant_id = f.pollutant_id
+    WHERE dl.city = %s
+      AND f.ts_utc >= %s::timestamp AT TIME ZONE 'UTC'
+      AND f.ts_utc < (%s::date + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC'
+    ORDER BY f.ts_utc, dp.code, dl.location
+"""
+
+
+def arrow_schema():
+    types = {
+        "string": pa.string(),
+        "float64": pa.float64(),
+        "int32": pa.int32(),
+        "date32": pa.date32(),
+        "timestamp[us, tz=UTC]": pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {"partitions": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(out_dir, manifest):
+    manifest["generated_at"] = datetime.now(timezone.utc).isoformat()
+    manifest["columns"] = [{"name": name, "type": kind} for name, kind in COLUMNS]
+    path = os.path.join(out_dir, MANIFEST)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def changed_partitions(cur, manifest, cities=None, full=False):
+    """(city, month start, change marker) for every partition that is new or changed since its export."""
+    cur.execute(
+        """
+        SELECT city, date_trunc('month', date)::date AS month, MAX(updated_at)
+        FROM agg_daily_pollution
+        WHERE %s::text[] IS NULL OR city = ANY(%s)
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        """,
+        (cities, cities),
+    )
+    changed = []
+    for city, month, marker in cur.fetchall():
+        entry = manifest["partitions"].get(partition_key(city, month))
+        if full or entry is None or datetime.fromisoformat(entry["source_updated_at"]) < marker:
+            changed.append((city, month, marker))
+    return changed
+
+
+def partition_key(city, month):
+    return f"city_key={city_slug(city)}/month={month:%Y-%m}"
+
+
+def export_partition(conn, out_dir, city, month, schema, compression):
+    """
+    Stream one (city, month) from a server-side cursor into a Parquet file,
+    one row group per EXPORT_BATCH_ROWS rows, and move it into place
+    atomically. Returns the manifest entry, or None when no hourly facts are
+    left for the month (e.g. compacted by retention) and the old file stays.
+    """
+    key = partition_key(city, month)
+    folder = os.path.join(out_dir, key)
+    path = os.path.join(folder, "part-0.parquet")
+    tmp = os.path.join(folder, ".part-0.parquet.tmp")  # dot-prefixed: ignored by dataset readers
+    rows, min_ts, max_ts = 0, None, None
+    writer = None
+    try:
+        with conn.cursor(name="export_partition") as cur:
+            cur.itersize = EXPORT_BATCH_ROWS
+            cur.execute(PARTITION_SQL, (city, month, month))
+            while True:
+                batch = cur.fetchmany(EXPORT_BATCH_ROWS)
+                if not batch:
+                    break
+                columns = list(zip(*batch))
+                table = pa.Table.from_arrays(
+                    [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema
+                )
+                if writer is None:
+                    os.makedirs(folder, exist_ok=True)
+                    writer = pq.ParquetWriter(tmp, schema, compression=compression)
+                writer.write_table(table)
+                rows += len(batch)
+                min_ts = min_ts or batch[0][5]
+                max_ts = batch[-1][5]
+        conn.commit()
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        return None
+    os.replace(tmp, path)
+    return {
+        "city": city,
+        "month": f"{month:%Y-%m}",
+        "path": f"{key}/part-0.parquet",
+        "rows": rows,
+        "bytes": os.path.getsize(path),
+        "min_ts_utc": min_ts.isoformat(),
+        "max_ts_utc": max_ts.isoformat(),
+    }
+
+
+def export_main(out_dir, cities=None, full=False, compression=None):
+    if pa is None:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+    compression = compression or EXPORT_COMPRESSION
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    schema = arrow_schema()
+    started = time.perf_counter()
+    print(f"[{datetime.now(timezone.utc)}] Export to {out_dir}")
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            todo = changed_partitions(cur, manifest, cities, full)
+        conn.commit()
+        print(f"{len(todo)} partitions to write ({len(manifest['partitions'])} in manifest)")
+        written = 0
+        for city, month, marker in todo:
+            part_started = time.perf_counter()
+            key = partition_key(city, month)
+            entry = export_partition(conn, out_dir, city, month, schema, compression)
+            if entry is None:
+                # Tombstone for a compacted month, so later runs skip it until its facts change
+                entry = dict(manifest["partitions"].get(key) or {"city": city, "month": f"{month:%Y-%m}", "path": None})
+                entry["compacted"] = True
+                print(f"Skipped {city} {month:%Y-%m}: no hourly facts, recorded as compacted")
+            else:
+                written += 1
+                print(
+                    f"Wrote {entry['path']}: {entry['rows']} rows, {entry['bytes']} bytes "
+                    f"in {time.perf_counter() - part_started:.2f}s"
+                )
+            entry["source_updated_at"] = marker.isoformat()
+            entry["exported_at"] = datetime.now(timezone.utc).isoformat()
+            manifest["partitions"][key] = entry
+            # Rewritten after every partition so an interrupted export resumes where it stopped
+            write_manifest(out_dir, manifest)
+    write_manifest(out_dir, manifest)
+    print(f"Exported {written} partitions in {time.perf_counter() - started:.2f}s")
+    return written
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Export the warehouse as Parquet partitioned by city and month.")
+    ap.add_argument("--out", default=EXPORT_DIR, required=EXPORT_DIR is None, help="export directory (or EXPORT_DIR)")
+    ap.add_argument("--cities", help="comma-separated city names (default: all)")
+    ap.add_argument("--full", action="store_true", help="rewrite every partition, not only changed ones")
+    ap.add_argument("--compression", help=f"Parquet codec (default {EXPORT_COMPRESSION}, or EXPORT_COMPRESSION)")
+    return ap.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    cities = [c.strip() for c in args.cities.split(",") if c.strip()] if args.cities else None
+    export_main(args.out, cities, args.full, args.compression)
@@ -9,6 +9,37 @@ CREATE TABLE IF NOT EXISTS dim_location (
   country     TEXT
 );
 
+-- Upgrade path: the old SELECT-then-INSERT location lookup could create
+-- duplicate (city, location) rows when two runs overlapped. Before the unique
+-- index below is first created, facts are repointed to the lowest location_id
+-- of each duplicate group (dropping hours both copies had loaded) and the
+-- extra dim_location rows are deleted.
+DO $$
+BEGIN
+  IF to_regclass('uq_dim_location_city_location') IS NULL THEN
+    CREATE TEMP TABLE dim_location_merge ON COMMIT DROP AS
+    SELECT location_id AS old_id, MIN(location_id) OVER (PARTITION BY city, location) AS new_id
+    FROM dim_location;
+    DELETE FROM dim_location_merge m
+    WHERE NOT EXISTS (SELECT 1 FROM dim_location_merge d WHERE d.new_id = m.new_id AND d.old_id <> d.new_id);
+    IF EXISTS (SELECT 1 FROM dim_location_merge) AND to_regclass('fact_air_quality') IS NOT NULL THEN
+      DELETE FROM fact_air_quality f
+      USING dim_location_merge m, fact_air_quality g, dim_location_merge mg
+      WHERE f.location_id = m.old_id AND m.old_id <> m.new_id
+        AND g.location_id = mg.old_id AND mg.new_id = m.new_id AND g.location_id < f.location_id
+        AND g.time_id = f.time_id AND g.pollutant_id = f.pollutant_id;
+      UPDATE fact_air_quality f SET location_id = m.new_id
+      FROM dim_location_merge m
+      WHERE f.location_id = m.old_id AND m.old_id <> m.new_id;
+    END IF;
+    DELETE FROM dim_location d USING dim_location_merge m
+    WHERE d.location_id = m.old_id AND m.old_id <> m.new_id;
+  END IF;
+END $$;
+
+-- Natural key used by the ETL's bulk key resolution (INSERT ... ON CONFLICT)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_dim_location_city_location ON dim_location(city, location);
+
 CREATE TABLE IF NOT EXISTS dim_time (
   time_id     SERIAL PRIMARY KEY,
   ts_utc      TIMESTAMPTZ NOT NULL UNIQUE,
@@ -28,14 +59,202 @@ CREATE TABLE IF NOT EXISTS dim_pollutant (
   category_cutoffs JSONB
 );
 
+-- Facts are range-partitioned by month on ts_utc (a copy of dim_time.ts_utc),
+-- so date-bounded scans prune to the relevant months and old history can be
+-- dropped a partition at a time. The ETL creates partitions as it loads.
+DROP FUNCTION IF EXISTS ensure_fact_partition(DATE);
+CREATE OR REPLACE FUNCTION ensure_fact_partition(month_start DATE, parent TEXT DEFAULT 'fact_air_quality')
+RETURNS TEXT AS $$
+DECLARE
+  lower_bound DATE := date_trunc('month', month_start)::date;
+  part TEXT := format('%s_p%s', parent, to_char(lower_bound, 'YYYY_MM'));
+BEGIN
+  IF to_regclass(part) IS NULL THEN
+    PERFORM pg_advisory_xact_lock(hashtext('fact_air_quality_partitions'));
+    EXECUTE format(
+      'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+      part,
+      parent,
+      lower_bound::timestamp AT TIME ZONE 'UTC',
+      (lower_bound + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC'
+    );
+  END IF;
+  RETURN part;
+END $$ LANGUAGE plpgsql;
+
+-- Upgrade path: an unpartitioned fact_air_quality from an earlier version of
+-- this file is moved aside here and copied into the partitioned table below
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'fact_air_quality' AND relkind = 'r') THEN
+    ALTER TABLE fact_air_quality RENAME TO fact_air_quality_unpartitioned;
+    ALTER TABLE fact_air_quality_unpartitioned RENAME CONSTRAINT fact_air_quality_pkey TO fact_air_quality_unpartitioned_pkey;
+    ALTER SEQUENCE fact_air_quality_fact_id_seq RENAME TO fact_air_quality_unpartitioned_fact_id_seq;
+  END IF;
+END $$;
+
 CREATE TABLE IF NOT EXISTS fact_air_quality (
-  fact_id      BIGSERIAL PRIMARY KEY,
+  fact_id      BIGSERIAL,
   location_id  INT REFERENCES dim_location(location_id),
   time_id      INT REFERENCES dim_time(time_id),
   pollutant_id INT REFERENCES dim_pollutant(pollutant_id),
+  ts_utc       TIMESTAMPTZ NOT NULL,   -- same instant as dim_time.ts_utc; partition key
   value        NUMERIC(10,2),          -- pollutant concentration
   aqi          NUMERIC(6,2),           -- AQI if provided/derived
   source       TEXT,
-  UNIQUE(location_id, time_id, pollutant_id)
+  PRIMARY KEY (fact_id, ts_utc),
+  UNIQUE(location_id, time_id, pollutant_id, ts_utc)
+) PARTITION BY RANGE (ts_utc);
+
+-- Per-location time range scans (rollup refresh, retention)
+CREATE INDEX IF NOT EXISTS idx_fact_air_quality_location_ts ON fact_air_quality(location_id, ts_utc);
+
+DO $$
+BEGIN
+  IF to_regclass('fact_air_quality_unpartitioned') IS NOT NULL THEN
+    PERFORM ensure_fact_partition(m::date)
+    FROM (
+      SELECT DISTINCT date_trunc('month', dt.ts_utc AT TIME ZONE 'UTC') AS m
+      FROM fact_air_quality_unpartitioned f JOIN dim_time dt ON dt.time_id = f.time_id
+    ) months;
+    INSERT INTO fact_air_quality (fact_id, location_id, time_id, pollutant_id, ts_utc, value, aqi, source)
+    SELECT f.fact_id, f.location_id, f.time_id, f.pollutant_id, dt.ts_utc, f.value, f.aqi, f.source
+    FROM fact_air_quality_unpartitioned f JOIN dim_time dt ON dt.time_id = f.time_id;
+    PERFORM setval(pg_get_serial_sequence('fact_air_quality', 'fact_id'), COALESCE(MAX(fact_id), 0) + 1, false)
+    FROM fact_air_quality;
+    -- The old materialized views read the unpartitioned table; views.sql replaces them
+    DROP MATERIALIZED VIEW IF EXISTS mv_daily_aqi, mv_monthly_pollution, mv_city_comparison;
+    DROP TABLE fact_air_quality_unpartitioned;
+  END IF;
+END $$;
+
+-- Wide layout (ETL_FACT_LAYOUT=wide): one row per location and hour with one
+-- column per pollutant code, about a seventh of the narrow table's rows and
+-- index entries. Partitioned like fact_air_quality (fact_air_quality_wide_pYYYY_MM);
+-- `run_etl.py --migrate-wide` moves narrow partitions into it.
+CREATE TABLE IF NOT EXISTS fact_air_quality_wide (
+  location_id  INT NOT NULL REFERENCES dim_location(location_id),
+  ts_utc       TIMESTAMPTZ NOT NULL,   -- partition key
+  time_id      INT REFERENCES dim_time(time_id),
+  pm25         NUMERIC(10,2),
+  pm10         NUMERIC(10,2),
+  co           NUMERIC(10,2),
+  no2          NUMERIC(10,2),
+  so2          NUMERIC(10,2),
+  o3           NUMERIC(10,2),
+  aqi          NUMERIC(6,2),
+  source       TEXT,
+  PRIMARY KEY (location_id, ts_utc)
+) PARTITION BY RANGE (ts_utc);
+
+-- Hourly facts from both layouts in the narrow shape. Everything that reads
+-- facts (rollup refresh, export, hourly charts) goes through this view, so it
+-- works before, during and after a migration. Filters on location_id and
+-- ts_utc are pushed into each table's scan.
+CREATE OR REPLACE VIEW v_fact_air_quality AS
+SELECT location_id, time_id, pollutant_id, ts_utc, value, aqi, source
+FROM fact_air_quality
+UNION ALL
+SELECT f.location_id, f.time_id, dp.pollutant_id, f.ts_utc, v.value, v.aqi, f.source
+FROM fact_air_quality_wide f
+CROSS JOIN LATERAL (
+  VALUES ('pm25', f.pm25, NULL::NUMERIC), ('pm10', f.pm10, NULL), ('co', f.co, NULL),
+         ('no2', f.no2, NULL), ('so2', f.so2, NULL), ('o3', f.o3, NULL), ('aqi', NULL, f.aqi)
+) AS v (code, value, aqi)
+JOIN dim_pollutant dp ON dp.code = v.code
+WHERE v.value IS NOT NULL OR v.aqi IS NOT NULL;
+
+-- Hourly facts older than the retention window, compacted to one row per
+-- location, day and pollutant before their partition is dropped
+CREATE TABLE IF NOT EXISTS fact_air_quality_daily (
+  location_id  INT REFERENCES dim_location(location_id),
+  date         DATE NOT NULL,
+  pollutant_id INT REFERENCES dim_pollutant(pollutant_id),
+  value_avg    NUMERIC(10,2),
+  value_min    NUMERIC(10,2),
+  value_max    NUMERIC(10,2),
+  aqi_avg      NUMERIC(6,2),
+  aqi_min      NUMERIC(6,2),
+  aqi_max      NUMERIC(6,2),
+  hours        INT NOT NULL,
+  source       TEXT,
+  PRIMARY KEY (location_id, date, pollutant_id)
 );
 
+-- ETL high-water mark: latest hour loaded per location and pollutant (incremental mode)
+CREATE TABLE IF NOT EXISTS etl_watermark (
+  location_id  INT REFERENCES dim_location(location_id),
+  pollutant_id INT REFERENCES dim_pollutant(pollutant_id),
+  last_ts_utc  TIMESTAMPTZ NOT NULL,
+  updated_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (location_id, pollutant_id)
+);
+
+-- Ingest-time anomaly detection: exponentially weighted mean and variance of
+-- the observed hourly values per location and pollutant, up to last_ts_utc.
+-- Each load folds in only the hours after last_ts_utc, so history is never rescanned
+CREATE TABLE IF NOT EXISTS etl_anomaly_state (
+  location_id  INT REFERENCES dim_location(location_id),
+  pollutant_id INT REFERENCES dim_pollutant(pollutant_id),
+  samples      BIGINT NOT NULL,
+  ewma         DOUBLE PRECISION NOT NULL,
+  ewm_var      DOUBLE PRECISION NOT NULL,
+  last_ts_utc  TIMESTAMPTZ NOT NULL,
+  updated_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (location_id, pollutant_id)
+);
+
+-- Hourly values flagged during ingest: |zscore| against the rolling statistics
+-- above ETL_ANOMALY_Z, and/or above the pollutant's ETL_ANOMALY_LIMITS entry
+-- (limit_value). expected/stddev are the statistics before this value
+CREATE TABLE IF NOT EXISTS anomaly_alert (
+  location_id  INT REFERENCES dim_location(location_id),
+  pollutant_id INT REFERENCES dim_pollutant(pollutant_id),
+  ts_utc       TIMESTAMPTZ NOT NULL,
+  value        NUMERIC(10,2) NOT NULL,
+  expected     NUMERIC(10,2),
+  stddev       NUMERIC(10,2),
+  zscore       DOUBLE PRECISION,
+  limit_value  NUMERIC(10,2),
+  detected_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (location_id, pollutant_id, ts_utc)
+);
+CREATE INDEX IF NOT EXISTS idx_anomaly_alert_detected ON anomaly_alert (detected_at);
+
+-- Bumped by the ETL in the same transaction as every load that changed data;
+-- the web app keys its response cache on it
+CREATE TABLE IF NOT EXISTS etl_data_version (
+  id         BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+  version    BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+INSERT INTO etl_data_version (id, version) VALUES (TRUE, 0) ON CONFLICT (id) DO NOTHING;
+
+-- One row per (city, window) committed by `run_etl.py --backfill`; an
+-- interrupted backfill skips these windows when re-run
+CREATE TABLE IF NOT EXISTS etl_backfill_checkpoint (
+  city         TEXT NOT NULL,
+  window_start DATE NOT NULL,
+  window_end   DATE NOT NULL,
+  rows_loaded  INT NOT NULL,
+  completed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (city, window_start, window_end)
+);
+
+-- Shard leases for `run_etl.py --shards N`: one row per (run, shard). A
+-- worker claims a shard by setting owner and lease_until and keeps renewing
+-- the lease while it loads; a shard whose worker died is claimable again once
+-- lease_until has passed. done_at is set in the transaction that commits the
+-- shard's facts.
+CREATE TABLE IF NOT EXISTS etl_shard_lease (
+  run_id       TEXT NOT NULL,
+  shard        INT NOT NULL,
+  shard_count  INT NOT NULL,
+  owner        TEXT,
+  lease_until  TIMESTAMPTZ,
+  attempts     INT NOT NULL DEFAULT 0,
+  done_at      TIMESTAMPTZ,
+  rows_loaded  INT,
+  last_error   TEXT,
+  PRIMARY KEY (run_id, shard)
+);
@@ -1,43 +1,126 @@
--- OLAP materialized views for fast analytics
+-- OLAP layer: incrementally maintained rollup tables + analytics views
 
--- Daily average AQI by city
-CREATE MATERIALIZED VIEW IF NOT EXISTS mv_daily_aqi AS
-SELECT dl.city, dt.date, AVG(f.aqi) AS avg_aqi
-FROM fact_air_quality f
-JOIN dim_location dl ON f.location_id = dl.location_id
-JOIN dim_time dt ON f.time_id = dt.time_id
-GROUP BY dl.city, dt.date;
+-- Rollups hold sum/count state (not averages) so buckets can be merged. The
+-- ETL recomputes only the (city, date) and (city, month) buckets a run touched
+-- (see refresh_rollups in etl/run_etl.py); no full REFRESH is ever needed.
+
+-- Per city, day and pollutant; the base every coarser rollup is merged from
+CREATE TABLE IF NOT EXISTS agg_daily_pollution (
+  city         TEXT NOT NULL,
+  date         DATE NOT NULL,
+  pollutant    TEXT NOT NULL,
+  value_sum    NUMERIC,
+  value_count  BIGINT NOT NULL DEFAULT 0,
+  aqi_sum      NUMERIC,
+  aqi_count    BIGINT NOT NULL DEFAULT 0,
+  value_min    NUMERIC,
+  value_max    NUMERIC,
+  aqi_min      NUMERIC,
+  aqi_max      NUMERIC,
+  updated_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (city, date, pollutant)
+);
+
+-- Added with the series pyramid; populated by --rebuild-rollups on existing installs
+ALTER TABLE agg_daily_pollution
+  ADD COLUMN IF NOT EXISTS value_min NUMERIC,
+  ADD COLUMN IF NOT EXISTS value_max NUMERIC,
+  ADD COLUMN IF NOT EXISTS aqi_min NUMERIC,
+  ADD COLUMN IF NOT EXISTS aqi_max NUMERIC;
+
+-- Daily AQI by city
+CREATE TABLE IF NOT EXISTS agg_daily_aqi (
+  city         TEXT NOT NULL,
+  date         DATE NOT NULL,
+  aqi_sum      NUMERIC,
+  aqi_count    BIGINT NOT NULL DEFAULT 0,
+  updated_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (city, date)
+);
+
+-- Monthly pollution per city and pollutant
+CREATE TABLE IF NOT EXISTS agg_monthly_pollution (
+  city         TEXT NOT NULL,
+  year         INT NOT NULL,
+  month        INT NOT NULL,
+  pollutant    TEXT NOT NULL,
+  value_sum    NUMERIC,
+  value_count  BIGINT NOT NULL DEFAULT 0,
+  updated_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (city, year, month, pollutant)
+);
+
+-- Each city's latest day across pollutants
+CREATE TABLE IF NOT EXISTS agg_city_comparison (
+  city         TEXT NOT NULL,
+  pollutant    TEXT NOT NULL,
+  date         DATE NOT NULL,
+  value_sum    NUMERIC,
+  value_count  BIGINT NOT NULL DEFAULT 0,
+  updated_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (city, pollutant)
+);
 
-CREATE INDEX IF NOT EXISTS idx_mv_daily_aqi_city_date ON mv_daily_aqi(city, date);
+-- Weekly (ISO, Monday start) and monthly buckets of the chart series pyramid,
+-- merged from agg_daily_pollution. Hourly points come from v_fact_air_quality
+-- and daily ones from agg_daily_pollution, so neither is stored again here.
+-- For the 'aqi' pollutant the stats are over the aqi column, otherwise value.
+CREATE TABLE IF NOT EXISTS agg_pollution_buckets (
+  city         TEXT NOT NULL,
+  pollutant    TEXT NOT NULL,
+  resolution   TEXT NOT NULL CHECK (resolution IN ('week', 'month')),
+  bucket_start DATE NOT NULL,
+  value_sum    NUMERIC,
+  value_count  BIGINT NOT NULL DEFAULT 0,
+  value_min    NUMERIC,
+  value_max    NUMERIC,
+  updated_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (city, pollutant, resolution, bucket_start)
+);
+
+-- Used when re-aggregating a touched day from the fact table
+CREATE INDEX IF NOT EXISTS idx_dim_time_date ON dim_time(date);
+
+-- The mv_* names are kept for the web app and Power BI; earlier versions of
+-- this file created them as materialized views, which are dropped here.
+DO $$
+DECLARE
+  mv TEXT;
+BEGIN
+  FOREACH mv IN ARRAY ARRAY['mv_daily_aqi', 'mv_monthly_pollution', 'mv_city_comparison'] LOOP
+    IF EXISTS (SELECT 1 FROM pg_matviews WHERE matviewname = mv) THEN
+      EXECUTE format('DROP MATERIALIZED VIEW %I', mv);
+    END IF;
+  END LOOP;
+END $$;
+
+-- Daily average AQI by city
+CREATE OR REPLACE VIEW mv_daily_aqi AS
+SELECT city, date, aqi_sum / NULLIF(aqi_count, 0) AS avg_aqi
+FROM agg_daily_aqi;
 
 -- Monthly pollution trends per pollutant
-CREATE MATERIALIZED VIEW IF NOT EXISTS mv_monthly_pollution AS
-SELECT dl.city, dt.year, dt.month, dp.code AS pollutant, AVG(f.value) AS avg_value
-FROM fact_air_quality f
-JOIN dim_location dl ON f.location_id = dl.location_id
-JOIN dim_time dt ON f.time_id = dt.time_id
-JOIN dim_pollutant dp ON f.pollutant_id = dp.pollutant_id
-GROUP BY dl.city, dt.year, dt.month, dp.code;
-
-CREATE INDEX IF NOT EXISTS idx_mv_monthly_pollution_city_date ON mv_monthly_pollution(city, year, month);
-
--- City-wise comparison for latest day across pollutants
-CREATE MATERIALIZED VIEW IF NOT EXISTS mv_city_comparison AS
-WITH latest_day AS (
-  SELECT MAX(date) AS max_date FROM dim_time
-)
-SELECT dl.city, dp.code AS pollutant, AVG(f.value) AS avg_value
-FROM fact_air_quality f
-JOIN dim_location dl ON f.location_id = dl.location_id
-JOIN dim_time dt ON f.time_id = dt.time_id
-JOIN dim_pollutant dp ON f.pollutant_id = dp.pollutant_id
-JOIN latest_day ld ON dt.date = ld.max_date
-GROUP BY dl.city, dp.code;
-
-CREATE INDEX IF NOT EXISTS idx_mv_city_comparison_city_pollutant ON mv_city_comparison(city, pollutant);
-
--- Helper: refresh all materialized views
--- REFRESH MATERIALIZED VIEW CONCURRENTLY mv_daily_aqi;
--- REFRESH MATERIALIZED VIEW CONCURRENTLY mv_monthly_pollution;
--- REFRESH MATERIALIZED VIEW CONCURRENTLY mv_city_comparison;
+CREATE OR REPLACE VIEW mv_monthly_pollution AS
+SELECT city, year, month, pollutant, value_sum / NULLIF(value_count, 0) AS avg_value
+FROM agg_monthly_pollution;
+
+-- City-wise comparison for each city's latest day across pollutants
+CREATE OR REPLACE VIEW mv_city_comparison AS
+SELECT city, pollutant, value_sum / NULLIF(value_count, 0) AS avg_value, date
+FROM agg_city_comparison;
+
+-- Daily, weekly and monthly levels of the series pyramid (see /api/series)
+CREATE OR REPLACE VIEW v_pollution_series AS
+SELECT city, pollutant, 'day'::text AS resolution, date AS bucket_start,
+       CASE WHEN pollutant = 'aqi' THEN aqi_sum / NULLIF(aqi_count, 0) ELSE value_sum / NULLIF(value_count, 0) END AS avg_value,
+       CASE WHEN pollutant = 'aqi' THEN aqi_min ELSE value_min END AS min_value,
+       CASE WHEN pollutant = 'aqi' THEN aqi_max ELSE value_max END AS max_value,
+       CASE WHEN pollutant = 'aqi' THEN aqi_count ELSE value_count END AS n
+FROM agg_daily_pollution
+UNION ALL
+SELECT city, pollutant, resolution, bucket_start,
+       value_sum / NULLIF(value_count, 0), value_min, value_max, value_count
+FROM agg_pollution_buckets;
 
+-- Helper: rebuild every rollup from the full fact table (first install or after a migration)
+--   python etl/run_etl.py --rebuild-rollups
@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ("etl", "webapp", "bench"):
+    sys.path.insert(0, os.path.join(ROOT, folder))
+
+# Results must not depend on the host's timezone; tests that need another
+# zone set TZ themselves (see the `local_tz` fixture)
+os.environ["TZ"] = "UTC"
+time.tzset()
+
+import run_etl  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+
+@pytest.fixture
+def local_tz(monkeypatch):
+    """Switch the process timezone for one test, e.g. local_tz("Europe/London")."""
+
+    def switch(name):
+        monkeypatch.setenv("TZ", name)
+        time.tzset()
+
+    yield switch
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """A bench stub server the ETL fetches from, without backoff sleeps or landing files."""
+    server = StubServer(years=2 / 365).start()
+    monkeypatch.setattr(run_etl, "API", server.url)
+    monkeypatch.setattr(run_etl, "FETCH_BACKOFF", 0.0)
+    monkeypatch.setattr(run_etl, "LANDING_DIR", None)
+    yield server
+    server.stop()
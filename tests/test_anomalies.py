@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+
+import run_etl
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def series(values):
+    ts_list = [START + timedelta(hours=i) for i in range(len(values))]
+    mask = bytearray(0 if v is None else 1 for v in values)
+    return ts_list, [0.0 if v is None else v for v in values], mask
+
+
+def test_spike_is_flagged_after_warmup():
+    values = [20.0 + (i % 5) for i in range(200)]
+    values[150] = 400.0
+    ts_list, vals, mask = series(values)
+    state, alerts = run_etl.detect_anomalies(None, ts_list, vals, mask, len(vals))
+    assert [a[0] for a in alerts] == [ts_list[150]]
+    ts, value, expected, stddev, z, limit = alerts[0]
+    assert value == 400.0 and 20 <= expected <= 25 and z >= run_etl.ANOMALY_Z and limit is None
+    assert state[0] == 200 and state[3] == ts_list[-1]
+
+
+def test_no_zscore_before_min_samples():
+    values = [20.0] * 10 + [400.0]
+    ts_list, vals, mask = series(values)
+    _, alerts = run_etl.detect_anomalies(None, ts_list, vals, mask, len(vals))
+    assert alerts == []
+
+
+def test_limit_alerts_without_history():
+    ts_list, vals, mask = series([10.0, 60.0, 30.0])
+    _, alerts = run_etl.detect_anomalies(None, ts_list, vals, mask, 3, limit=50.0)
+    assert [(a[0], a[1], a[5]) for a in alerts] == [(ts_list[1], 60.0, 50.0)]
+
+
+def test_incremental_matches_single_pass():
+    values = [20.0 + (i % 7) * 1.5 for i in range(300)]
+    values[10] = values[120] = None
+    values[250] = 500.0
+    ts_list, vals, mask = series(values)
+    whole, whole_alerts = run_etl.detect_anomalies(None, ts_list, vals, mask, len(vals))
+    state, alerts = run_etl.detect_anomalies(None, ts_list, vals, mask, 100)
+    # A later run sees an overlapping payload; already folded hours are skipped
+    state, more = run_etl.detect_anomalies(state, ts_list, vals, mask, len(vals))
+    assert state == whole
+    assert alerts + more == whole_alerts
+    assert run_etl.detect_anomalies(state, ts_list, vals, mask, len(vals)) == (None, [])
+
+
+def test_nulls_are_skipped():
+    ts_list, vals, mask = series([None, None])
+    assert run_etl.detect_anomalies(None, ts_list, vals, mask, 2) == (None, [])
@@ -0,0 +1,49 @@
+import base64
+import json
+
+import pytest
+
+import app
+
+
+def cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    token = app.encode_cursor((2025, 1, "pm25"))
+    assert app.decode_cursor(token, (int, int, str)) == [2025, 1, "pm25"]
+
+
+@pytest.mark.parametrize(
+    "token, types",
+    [
+        (cursor([2025, 1, {"a": 1}]), (int, int, str)),
+        (cursor(["a", [1, 2]]), (str, str)),
+        (cursor([2025, True, "pm25"]), (int, int, str)),
+        (cursor([2025.5, 1, "pm25"]), (int, int, str)),
+        (cursor([None]), (str,)),
+        (cursor(["a"]), (str, str)),
+        (cursor({"city": "a"}), (str, str)),
+        ("not base64 json!", (str,)),
+    ],
+)
+def test_tampered_cursor_is_rejected(token, types):
+    with pytest.raises(app.BadRequest, match="invalid cursor"):
+        app.decode_cursor(token, types)
+
+
+@pytest.mark.parametrize(
+    "path, key",
+    [
+        ("/api/monthly", [2025, 1, {"a": 1}]),
+        ("/api/comparison", ["a", [1, 2]]),
+        ("/api/daily", [["2025-01-01"]]),
+    ],
+)
+def test_tampered_cursor_is_a_400(monkeypatch, path, key):
+    # Rejected before any query runs, so no database is needed
+    monkeypatch.setattr(app, "data_version", lambda: 1)
+    resp = app.app.test_client().get(f"{path}?city=Colombo&cursor={cursor(key)}")
+    assert resp.status_code == 400
+    assert resp.get_json() == {"error": "invalid cursor"}
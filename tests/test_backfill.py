@@ -0,0 +1,21 @@
+from datetime import date
+
+import pytest
+
+import run_etl
+
+
+@pytest.mark.parametrize("days", [1, 7, 31, 400])
+def test_backfill_windows_cover_the_range(days):
+    start, end = date(2024, 1, 1), date(2025, 3, 15)
+    windows = run_etl.backfill_windows(start, end, days)
+    assert windows[0][0] == start and windows[-1][1] == end
+    for (a, b), (c, _) in zip(windows, windows[1:]):
+        assert (c - b).days == 1
+    assert all(0 <= (b - a).days < days for a, b in windows)
+    assert len(windows) == -(-((end - start).days + 1) // days)
+
+
+def test_backfill_windows_empty_and_single_day():
+    assert run_etl.backfill_windows(date(2025, 1, 2), date(2025, 1, 1), 7) == []
+    assert run_etl.backfill_windows(date(2025, 1, 1), date(2025, 1, 1), 7) == [(date(2025, 1, 1), date(2025, 1, 1))]
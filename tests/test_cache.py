@@ -0,0 +1,27 @@
+import app
+
+
+def test_versioned_cache_evicts_least_recently_used():
+    cache = app.VersionedCache(max_entries=3, max_bytes=1000)
+    for key in "abc":
+        cache.put(key, 1, key.upper(), 10)
+    assert cache.get("a", 1) == "A"  # "b" is now the oldest
+    cache.put("d", 1, "D", 10)
+    assert cache.get("b", 1) is None
+    assert [cache.get(k, 1) for k in "acd"] == ["A", "C", "D"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_versioned_cache_byte_bound_and_versions():
+    cache = app.VersionedCache(max_entries=100, max_bytes=100)
+    cache.put("a", 1, "A", 60)
+    cache.put("b", 1, "B", 60)
+    assert cache.get("a", 1) is None and cache.get("b", 1) == "B"
+    assert cache.stats()["bytes"] == 60
+    # Too large to cache at all, but still returned to the caller
+    assert cache.put("huge", 1, "H", 101) == "H"
+    assert cache.get("huge", 1) is None and cache.get("b", 1) == "B"
+    # Entries built from an older data version are misses
+    assert cache.get("b", 2) is None
+    cache.put("b", 2, "B2", 30)
+    assert cache.get("b", 2) == "B2" and cache.stats()["bytes"] == 30
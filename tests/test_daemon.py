@@ -0,0 +1,45 @@
+import pytest
+
+import run_etl
+
+
+@pytest.fixture
+def schedule(monkeypatch):
+    monkeypatch.setattr(run_etl, "DAEMON_JITTER", 0.0)
+    monkeypatch.setattr(run_etl, "DAEMON_MAX_BACKOFF", 1000.0)
+    return run_etl.CitySchedule({"city": "Colombo", "interval_seconds": 100}, now=0.0)
+
+
+def test_failures_back_off_exponentially_up_to_the_cap(schedule):
+    dues = []
+    for now in (0.0, 1.0, 2.0, 3.0, 4.0, 5.0):
+        schedule.failed(RuntimeError("boom"), now)
+        dues.append(schedule.next_due - now)
+    assert dues == [100.0, 200.0, 400.0, 800.0, 1000.0, 1000.0]
+    assert schedule.failures == 6 and schedule.last_error == "RuntimeError: boom"
+    schedule.succeeded(None, 10.0)
+    assert schedule.failures == 0 and schedule.last_error is None
+
+
+def test_success_keeps_the_cadence(schedule):
+    schedule.next_due = 0.0
+    schedule.succeeded(None, 3.0)
+    assert schedule.next_due == 100.0
+    schedule.succeeded(None, 101.0)
+    assert schedule.next_due == 200.0 and schedule.coalesced == 0
+
+
+def test_overrun_slots_are_coalesced(schedule):
+    schedule.next_due = 0.0
+    # The load finished 3.5 intervals late: slots 100, 200 and 300 were missed
+    schedule.succeeded(None, 350.0)
+    assert schedule.coalesced == 3
+    assert schedule.next_due == 400.0
+
+
+def test_stale_after_three_intervals(schedule):
+    assert not schedule.is_stale(300.0)
+    assert schedule.is_stale(301.0)
+    schedule.succeeded(None, 301.0)
+    assert not schedule.is_stale(302.0)
+    assert schedule.status(302.0)["stale"] is False
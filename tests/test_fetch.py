@@ -0,0 +1,45 @@
+import run_etl
+from generate import make_cities
+
+
+def fetched(results):
+    out = {}
+    for cfg, data, error in results:
+        assert cfg["city"] not in out
+        out[cfg["city"]] = (data, error)
+    return out
+
+
+def test_fetch_all_groups_locations(stub):
+    cfgs = make_cities(11)
+    with run_etl.make_session() as session:
+        out = fetched(run_etl.fetch_all(cfgs, session, concurrency=3, group_size=4))
+    assert stub.requests == 3
+    assert sorted(out) == sorted(cfg["city"] for cfg in cfgs)
+    for cfg in cfgs:
+        data, error = out[cfg["city"]]
+        assert error is None
+        # Each payload is matched back to the city it was requested for
+        assert (data["latitude"], data["longitude"]) == (cfg["latitude"], cfg["longitude"])
+        assert len(data["hourly"]["time"]) == 48
+
+
+def test_fetch_all_retries_transient_failures(stub):
+    stub.failures = 2
+    cfgs = make_cities(4)
+    with run_etl.make_session() as session:
+        out = fetched(run_etl.fetch_all(cfgs, session, concurrency=1, group_size=2))
+    assert all(error is None for _, error in out.values())
+    assert stub.requests == 2 + 2
+
+
+def test_fetch_all_reports_each_city_of_a_failed_group(stub, monkeypatch):
+    monkeypatch.setattr(run_etl, "FETCH_RETRIES", 1)
+    stub.failures = 2
+    cfgs = make_cities(3)
+    with run_etl.make_session() as session:
+        out = fetched(run_etl.fetch_all(cfgs, session, concurrency=1, group_size=2))
+    failed = sorted(city for city, (data, error) in out.items() if error is not None)
+    assert failed == sorted(cfg["city"] for cfg in cfgs[:2])
+    assert out[cfgs[2]["city"]][1] is None
+    assert all(out[city][0] is None for city in failed)
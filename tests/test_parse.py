@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from dateutil import parser
+
+import run_etl
+from generate import make_payload
+
+# The night of the EU clock change, so a host-local conversion would show up
+START = datetime(2025, 3, 29, 20, tzinfo=timezone.utc)
+
+
+def hours(n, start=START):
+    return [(start + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M") for i in range(n)]
+
+
+def reference(times):
+    """Open-Meteo is asked for timezone=UTC, so strings without an offset are UTC."""
+    out = []
+    for t in times:
+        dt = parser.isoparse(t)
+        out.append(dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc))
+    return out
+
+
+def test_parse_timestamps_regular_grid():
+    times = hours(72)
+    assert run_etl.parse_timestamps(times) == reference(times)
+    assert run_etl.parse_timestamps(times)[5] == datetime(2025, 3, 30, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "times",
+    [
+        hours(5) + hours(5, START + timedelta(hours=7)),  # gap
+        hours(5) + hours(5, START + timedelta(hours=4)),  # duplicate hour
+        hours(3)[::-1],  # out of order
+        ["2025-03-29T20:00+02:00", "2025-03-29T21:00+01:00", "2025-03-29T22:00+01:00"],  # offset change
+        ["2025-03-29T20:00Z", "2025-03-29T21:00Z"],
+        hours(1),
+        [],
+    ],
+)
+def test_parse_timestamps_irregular_grid(times):
+    assert run_etl.parse_timestamps(times) == reference(times)
+
+
+def test_parse_timestamps_checks_every_point():
+    # Regular at the start, middle and end, with one hour missing in between
+    times = hours(100)
+    del times[25]
+    times.insert(75, times[75])
+    assert run_etl.parse_timestamps(times) == reference(times)
+
+
+def test_parse_hourly_masks_nulls():
+    hourly = {
+        "time": hours(4),
+        "pm2_5": [1.5, None, 3.0, None],
+        "ozone": [10.0, 11.0, 12.0, 13.0, 14.0],  # longer than the time axis
+        "pm10": [],
+        "unknown_field": [1, 2, 3, 4],
+    }
+    cols = run_etl.parse_hourly(hourly)
+    assert cols.timestamps == reference(hours(4))
+    assert sorted(cols.values) == ["ozone", "pm2_5"]
+    assert list(cols.values["pm2_5"]) == [1.5, 0.0, 3.0, 0.0]
+    assert list(cols.masks["pm2_5"]) == [1, 0, 1, 0]
+    assert list(cols.values["ozone"]) == [10.0, 11.0, 12.0, 13.0]
+    assert list(cols.masks["ozone"]) == [1, 1, 1, 1]
+
+
+def test_parse_hourly_matches_payload():
+    payload = make_payload(6.9, 79.8, START, 24 * 30)["hourly"]
+    cols = run_etl.parse_hourly(payload)
+    for field in run_etl.POLLUTANT_FIELDS:
+        expected = payload[field]
+        got = [v if m else None for v, m in zip(cols.values[field], cols.masks[field])]
+        assert got == expected
+
+
+@pytest.mark.parametrize("zone", ["Europe/London", "America/New_York", "Asia/Colombo"])
+def test_naive_timestamps_are_utc_whatever_the_host_timezone(local_tz, zone):
+    local_tz(zone)
+    times = hours(72)
+    expected = [START + timedelta(hours=i) for i in range(72)]
+    assert run_etl.parse_timestamps(times) == expected
+    # The per-string fallback (one hour missing) must agree with the fast path
+    assert run_etl.parse_timestamps(times[:30] + times[31:]) == expected[:30] + expected[31:]
+    assert run_etl.to_utc("2025-03-30T01:00") == datetime(2025, 3, 30, 1, tzinfo=timezone.utc)
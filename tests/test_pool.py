@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+import app
+
+
+class FakeConnection:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(app.ConnectionPool, "_connect", lambda self: FakeConnection())
+    return app.ConnectionPool("unused", minconn=0, maxconn=2, timeout=0.2, check_idle=60)
+
+
+def test_pool_times_out_when_exhausted(pool):
+    a, b = pool.getconn(), pool.getconn()
+    with pytest.raises(app.PoolTimeout):
+        pool.getconn()
+    stats = pool.stats()
+    assert stats["in_use"] == 2 and stats["timeouts"] == 1
+    pool.putconn(a)
+    assert pool.getconn() is a
+    pool.putconn(b, broken=True)
+    assert b.closed and pool.stats()["size"] == 1
+
+
+def test_pool_waiter_gets_returned_connection(pool):
+    a, _ = pool.getconn(), pool.getconn()
+    timer = threading.Timer(0.05, pool.putconn, (a,))
+    timer.start()
+    assert pool.getconn() is a
+    timer.join()
+    assert pool.stats()["timeouts"] == 0
+
+
+def test_pool_timeout_is_a_503(pool, monkeypatch):
+    monkeypatch.setattr(app, "_pool", pool)
+    held = [pool.getconn(), pool.getconn()]
+    resp = app.app.test_client().get("/api/daily?city=Colombo")
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+    for conn in held:
+        pool.putconn(conn)
@@ -0,0 +1,41 @@
+import json
+from datetime import date
+
+import app
+
+D = date(2025, 6, 2)
+P = date(2025, 6, 1)
+ENTRIES = [
+    ("Colombo", D, 40.0, P, 50.0),
+    ("Delhi", D, 180.0, P, 120.0),
+    ("Nowhere", D, None, None, None),
+    ("Oslo", D, 12.0, None, None),
+]
+
+
+def cities(rows):
+    return [r["city"] for r in rows]
+
+
+def test_rank_descending_puts_missing_values_last():
+    rows = app.RankingSnapshot.rank(ENTRIES)
+    assert cities(rows) == ["Delhi", "Colombo", "Oslo", "Nowhere"]
+    assert [r["rank"] for r in rows] == [1, 2, 3, 4]
+    delhi = rows[0]
+    assert delhi["change"] == 60.0 and delhi["change_pct"] == 50.0 and delhi["previous_date"] == "2025-06-01"
+    assert rows[2]["change"] is None and rows[2]["previous_value"] is None
+
+
+def test_rank_ascending_also_puts_missing_values_last():
+    rows = app.RankingSnapshot.rank(ENTRIES, descending=False)
+    assert cities(rows) == ["Oslo", "Colombo", "Delhi", "Nowhere"]
+    assert [r["rank"] for r in rows] == [1, 2, 3, 4]
+
+
+def test_snapshot_payloads_per_order():
+    snapshot = app.RankingSnapshot(7, {"aqi": ENTRIES})
+    desc = json.loads(snapshot.payloads[("aqi", "desc")])
+    asc = json.loads(snapshot.payloads[("aqi", "asc")])
+    assert desc["version"] == asc["version"] == 7
+    assert cities(desc["cities"]) == ["Delhi", "Colombo", "Oslo", "Nowhere"]
+    assert cities(asc["cities"]) == ["Oslo", "Colombo", "Delhi", "Nowhere"]
@@ -0,0 +1,21 @@
+import math
+
+import app
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    xs = list(range(1000))
+    ys = [math.sin(x / 50) for x in xs]
+    ys[437] = 25.0
+    ys[812] = -25.0
+    kept = app.lttb(xs, ys, 50)
+    assert len(kept) == 50
+    assert kept[0] == 0 and kept[-1] == 999
+    assert kept == sorted(set(kept))
+    assert 437 in kept and 812 in kept
+
+
+def test_lttb_small_inputs():
+    assert app.lttb([1, 2, 3], [1, 2, 3], 5) == [0, 1, 2]
+    assert app.lttb(list(range(10)), [0] * 10, 2) == [0, 9]
+    assert app.lttb([], [], 10) == []
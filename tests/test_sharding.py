@@ -0,0 +1,21 @@
+import zlib
+
+import run_etl
+
+
+def test_shard_of_is_stable_and_balanced():
+    cities = [f"City {i}" for i in range(4000)]
+    counts = [0] * 8
+    for city in cities:
+        shard = run_etl.shard_of(city, 8)
+        # crc32, not hash(): the same on every host regardless of PYTHONHASHSEED
+        assert shard == zlib.crc32(city.encode("utf-8")) % 8
+        counts[shard] += 1
+    assert min(counts) > 400 and max(counts) < 600
+    assert run_etl.shard_of("Colombo", 1) == 0
+    assert run_etl.shard_of("São Paulo", 5) == run_etl.shard_of("São Paulo", 5)
+
+
+def test_default_run_id_is_per_minute():
+    run_id = run_etl.default_run_id()
+    assert len(run_id) == len("20250101T1300") and run_id[8] == "T"
@@ -0,0 +1,53 @@
+import math
+import random
+
+import pytest
+
+import app
+
+
+def random_stations(n, seed=1):
+    rng = random.Random(seed)
+    return [(i, "City", f"Station {i}", "XX", rng.uniform(-90, 90), rng.uniform(-180, 180)) for i in range(n)]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * app.EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def test_kdtree_matches_brute_force():
+    rng = random.Random(7)
+    points = [(rng.random(), rng.random(), rng.random()) for _ in range(20000)]
+    tree = app.KDTree(points)
+    for _ in range(20):
+        q = (rng.random(), rng.random(), rng.random())
+        k = rng.randint(1, 20)
+        brute = sorted(sum((a - b) ** 2 for a, b in zip(p, q)) for p in points)[:k]
+        assert [d2 for _, d2 in tree.nearest(q, k)] == pytest.approx(brute)
+        lo = tuple(c - 0.1 for c in q)
+        hi = tuple(c + 0.1 for c in q)
+        inside = [i for i, p in enumerate(points) if all(l <= c <= h for l, c, h in zip(lo, p, hi))]
+        assert sorted(tree.within(lo, hi)) == inside
+    assert app.KDTree([]).nearest((0, 0, 0), 3) == []
+
+
+def test_location_index_matches_brute_force():
+    rows = random_stations(20000)
+    index = app.LocationIndex(rows, max_id=len(rows) - 1, version=1)
+    rng = random.Random(3)
+    for _ in range(20):
+        lat, lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        brute = sorted((haversine_km(lat, lon, r[4], r[5]), r[0]) for r in rows)[:5]
+        found = index.nearest(lat, lon, 5)
+        assert [s["location_id"] for s, _ in found] == [i for _, i in brute]
+        assert [d for _, d in found] == pytest.approx([d for d, _ in brute], abs=1e-6)
+
+
+def test_location_index_bbox_crosses_antimeridian():
+    rows = random_stations(5000)
+    index = app.LocationIndex(rows, max_id=len(rows) - 1, version=1)
+    found = [s["location_id"] for s in index.within(-30, 150, 30, -150)]
+    expected = [r[0] for r in rows if -30 <= r[4] <= 30 and (r[5] >= 150 or r[5] <= -150)]
+    assert found == expected
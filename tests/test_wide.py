@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+
+import run_etl
+from generate import make_payload
+
+
+def test_narrow_and_wide_rows_hold_the_same_values():
+    payload = make_payload(6.9, 79.8, datetime(2025, 3, 29, 20, tzinfo=timezone.utc), 24 * 7)["hourly"]
+    cols = run_etl.parse_hourly(payload)
+    ts_list = cols.timestamps
+    time_id_col = run_etl.time_id_column(ts_list, {ts: i for i, ts in enumerate(ts_list)})
+    cutoff = ts_list[40]
+    narrow, columns = set(), {}
+    for pollutant_id, (field, (code, _)) in enumerate(run_etl.POLLUTANT_FIELDS.items()):
+        mask = cols.masks[field]
+        first, skipped = run_etl.apply_cutoff(ts_list, mask, cutoff)
+        assert first == 41 and skipped == sum(mask[:41])
+        for row in run_etl.narrow_rows(1, pollutant_id, code, ts_list, time_id_col, cols.values[field], mask, first):
+            narrow.add((row[3], code, row[5] if code == "aqi" else row[4]))
+        columns[code] = run_etl.wide_column(cols.values[field], mask, first, len(ts_list))
+    wide = set()
+    for row in run_etl.wide_rows(1, ts_list, time_id_col, columns):
+        ts, values = row[1], row[3:-1]
+        assert ts > cutoff
+        wide.update((ts, code, v) for code, v in zip(run_etl.WIDE_COLUMNS, values) if v is not None)
+    assert narrow == wide
+    assert all(ts > cutoff for ts, _, _ in narrow)